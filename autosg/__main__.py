@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
-import csv
+import asyncio
 import json
 import os
+import re
 import sys
 from collections.abc import Callable, Iterator
 from pathlib import Path
@@ -12,49 +13,109 @@ from typing import Any, TextIO
 
 import click
 
+from ._workers import annotate_in_memory, annotate_one, dump_one, map_files
 from .annotating import (
+    ANNOTATED_SUFFIX,
     FileEncoding,
     annotate_source,
-    encode_output,
     read_source_utf8,
 )
-from .parsing import byte_col_to_char_col, detect_language, parse_identifiers
+from .parsing import detect_language, parse_identifiers, path_suffix
 
 # ---------------------------------------------------------------------------
 # Path resolution
 # ---------------------------------------------------------------------------
 
-ANNOTATED_SUFFIX: str = ".annotated"
+def _iter_files(root: str, recursive: bool) -> Iterator[str]:
+    """Yield files under *root* using os.scandir, in no particular order.
+
+    ``DirEntry`` caches the file type from the directory read, so unlike
+    ``Path.rglob`` + ``is_file`` no per-entry ``stat`` is needed (except
+    for symlinks).  Symlinked directories are not followed.
+    """
+    pending: list[str] = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield entry.path
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+        except PermissionError:
+            continue
+
+
+def _scan_files(root: str, recursive: bool) -> list[str]:
+    """List files under *root*, sorted like ``sorted(Path)``."""
+    found: list[str] = list(_iter_files(root, recursive))
+    # Compare component-wise, as Path ordering does.
+    found.sort(key=lambda p: p.split(os.sep))
+    return found
 
 
-def resolve_paths(paths: tuple[Path, ...], recursive: bool) -> Iterator[Path]:
-    """Expand directories into individual file paths."""
+def resolve_paths(paths: tuple[Path, ...], recursive: bool) -> Iterator[str]:
+    """Expand directories into individual file paths.
+
+    Paths are yielded as plain strings: building a ``Path`` per file costs
+    more than everything downstream needs from it.
+    """
     for path in paths:
         if path.is_file():
-            yield path
+            yield str(path)
         elif path.is_dir():
-            if recursive:
-                yield from sorted(p for p in path.rglob("*") if p.is_file())
-            else:
-                yield from sorted(p for p in path.iterdir() if p.is_file())
+            yield from _scan_files(str(path), recursive)
         else:
             click.echo(f"Warning: {path} is not a file or directory, skipping.", err=True)
 
 
-def resolve_source_paths(paths: tuple[Path, ...], recursive: bool) -> Iterator[Path]:
+def resolve_source_paths(paths: tuple[Path, ...], recursive: bool) -> Iterator[str]:
     """Like resolve_paths but skips .annotated files."""
     for path in resolve_paths(paths, recursive):
-        if not path.name.endswith(ANNOTATED_SUFFIX):
+        if not path.endswith(ANNOTATED_SUFFIX):
             yield path
 
 
+def resolve_language_paths(
+    paths: tuple[Path, ...], recursive: bool,
+) -> list[tuple[str, str]]:
+    """Resolve source paths paired with their language, warning on unsupported ones."""
+    tasks: list[tuple[str, str]] = []
+    for file_path in resolve_source_paths(paths, recursive):
+        language: str | None = detect_language(file_path)
+        if language is None:
+            click.echo(
+                f"Warning: unsupported file extension {path_suffix(file_path)!r} "
+                f"for {file_path}, skipping.",
+                err=True,
+            )
+            continue
+        tasks.append((file_path, language))
+    return tasks
+
+
+# ---------------------------------------------------------------------------
+# CSV output
+# ---------------------------------------------------------------------------
+
+_CSV_OUTPUT_BUFFER: int = 1 << 20
+_CSV_NEEDS_QUOTING: re.Pattern[str] = re.compile(r'[,"\r\n]')
+
+
+def _csv_field(value: str) -> str:
+    """Quote *value* the way ``csv.writer`` does by default (QUOTE_MINIMAL)."""
+    if _CSV_NEEDS_QUOTING.search(value) is None:
+        return value
+    return '"' + value.replace('"', '""') + '"'
+
+
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
 
 
 def common_options(f: Callable[..., object]) -> Callable[..., object]:
-    """Shared PATHS argument and -r/--recursive option for all subcommands."""
+    """Shared PATHS argument and -r/--recursive, -j/--jobs options for file subcommands."""
     f = click.argument(
         "paths",
         nargs=-1,
@@ -67,6 +128,12 @@ def common_options(f: Callable[..., object]) -> Callable[..., object]:
         default=False,
         help="Recurse into directories.",
     )(f)
+    f = click.option(
+        "-j", "--jobs",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Number of worker processes (default: CPU count).",
+    )(f)
     return f
 
 
@@ -83,40 +150,34 @@ def cli() -> None:
     default=None,
     help="Output CSV path (default: stdout).",
 )
-def dump_identifiers(paths: tuple[Path, ...], recursive: bool, output: Path | None) -> None:
+def dump_identifiers(
+    paths: tuple[Path, ...], recursive: bool, jobs: int | None, output: Path | None,
+) -> None:
     """Dump all identifiers to CSV."""
     out: TextIO
     if output is not None:
-        out = open(output, "w", newline="")
+        out = open(output, "w", newline="", buffering=_CSV_OUTPUT_BUFFER)
     else:
         out = sys.stdout
     try:
-        writer = csv.writer(out)
-        writer.writerow(["id", "path", "row", "col", "text"])
+        # Rows are formatted by hand and written once per file: per-row
+        # csv.writer calls dominate runtime on large corpora.
+        out.write("id,path,row,col,text\r\n")
         global_id: int = 0
-        for file_path in resolve_source_paths(paths, recursive):
-            language: str | None = detect_language(file_path)
-            if language is None:
-                click.echo(
-                    f"Warning: unsupported file extension {file_path.suffix!r} "
-                    f"for {file_path}, skipping.",
-                    err=True,
-                )
-                continue
-            result: tuple[bytes, FileEncoding] | None = read_source_utf8(file_path)
-            if result is None:
+        tasks: list[tuple[str, str]] = resolve_language_paths(paths, recursive)
+        for (file_path, _language), rows in zip(tasks, map_files(dump_one, tasks, jobs)):
+            if rows is None:
                 click.echo(
                     f"Warning: unsupported encoding for {file_path}, skipping.",
                     err=True,
                 )
                 continue
-            utf8_bytes, _enc = result
-            rel_path: str = os.path.relpath(file_path)
-            source_lines: list[bytes] = utf8_bytes.splitlines()
-            for row, byte_col, text in parse_identifiers(utf8_bytes, language):
-                char_col: int = byte_col_to_char_col(source_lines[row - 1], byte_col)
-                writer.writerow([global_id, rel_path, row, char_col, text])
-                global_id += 1
+            rel_path: str = _csv_field(os.path.relpath(file_path))
+            out.write("".join([
+                f"{ident_id},{rel_path},{row},{char_col},{_csv_field(text)}\r\n"
+                for ident_id, (row, char_col, text) in enumerate(rows, global_id)
+            ]))
+            global_id += len(rows)
     finally:
         if out is not sys.stdout:
             out.close()
@@ -131,47 +192,36 @@ def dump_identifiers(paths: tuple[Path, ...], recursive: bool, output: Path | No
     help="Remove .annotated files instead of creating them.",
 )
 def annotate_files(
-    paths: tuple[Path, ...], recursive: bool, clean: bool,
+    paths: tuple[Path, ...], recursive: bool, jobs: int | None, clean: bool,
 ) -> None:
     """Annotate identifiers in source files, producing .annotated copies."""
     if clean:
         removed: int = 0
         for path in paths:
             if path.is_file():
-                annotated: Path = path.parent / (path.name + ANNOTATED_SUFFIX)
-                if annotated.exists():
-                    annotated.unlink()
+                try:
+                    os.unlink(str(path) + ANNOTATED_SUFFIX)
                     removed += 1
+                except FileNotFoundError:
+                    pass
             elif path.is_dir():
-                pattern: str = "**/*" + ANNOTATED_SUFFIX if recursive else "*" + ANNOTATED_SUFFIX
-                for annotated_file in sorted(path.glob(pattern)):
-                    annotated_file.unlink()
-                    removed += 1
+                for file_path in _iter_files(str(path), recursive):
+                    if file_path.endswith(ANNOTATED_SUFFIX):
+                        os.unlink(file_path)
+                        removed += 1
         click.echo(f"Removed {removed} .annotated file(s).")
         return
 
     file_count: int = 0
     total_ids: int = 0
-    for file_path in resolve_source_paths(paths, recursive):
-        language: str | None = detect_language(file_path)
-        if language is None:
-            click.echo(
-                f"Warning: unsupported file extension {file_path.suffix!r} "
-                f"for {file_path}, skipping.",
-                err=True,
-            )
-            continue
-        result: tuple[bytes, FileEncoding] | None = read_source_utf8(file_path)
-        if result is None:
+    tasks: list[tuple[str, str]] = resolve_language_paths(paths, recursive)
+    for (file_path, _language), next_id in zip(tasks, map_files(annotate_one, tasks, jobs)):
+        if next_id is None:
             click.echo(
                 f"Warning: unsupported encoding for {file_path}, skipping.",
                 err=True,
             )
             continue
-        utf8_bytes, enc = result
-        annotated_utf8, next_id = annotate_source(utf8_bytes, language, 0)
-        out_path: Path = file_path.parent / (file_path.name + ANNOTATED_SUFFIX)
-        out_path.write_bytes(encode_output(annotated_utf8, enc))
         file_count += 1
         total_ids += next_id
     click.echo(f"Annotated {file_count} file(s), {total_ids} identifier(s).")
@@ -210,7 +260,7 @@ def llm_resolve(path: Path, model: str | None, no_cache: bool) -> None:
         if ann_result is None:
             click.echo(f"Error: unsupported encoding for {path}.", err=True)
             sys.exit(1)
-        annotated_text: str = ann_result[0].decode("utf-8")
+        annotated_utf8: bytes = ann_result[0]
         base_name: str = path.name[: -len(ANNOTATED_SUFFIX)]
         language: str | None = detect_language(path.parent / base_name)
     else:
@@ -228,9 +278,8 @@ def llm_resolve(path: Path, model: str | None, no_cache: bool) -> None:
             sys.exit(1)
         utf8_bytes, _enc = src_result
         annotated_utf8, _next_id = annotate_source(
-            utf8_bytes, language, 0,
+            utf8_bytes, parse_identifiers(utf8_bytes, language), 0,
         )
-        annotated_text = annotated_utf8.decode("utf-8")
 
     if language is None:
         click.echo(f"Error: cannot detect language for {path}.", err=True)
@@ -238,7 +287,7 @@ def llm_resolve(path: Path, model: str | None, no_cache: bool) -> None:
 
     try:
         result: dict[str, Any] = llmresolver.resolve(
-            annotated_text, language, model=effective_model,
+            annotated_utf8, language, model=effective_model,
             use_cache=not no_cache,
         )
     except (RuntimeError, ValueError) as exc:
@@ -246,5 +295,82 @@ def llm_resolve(path: Path, model: str | None, no_cache: bool) -> None:
     click.echo(json.dumps(result, indent=2))
 
 
+@cli.command("llm-resolve-many")
+@common_options
+@click.option(
+    "--model",
+    default=None,
+    help="LiteLLM model identifier (default: anthropic/claude-sonnet-4-20250514).",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Skip the disk cache and always call the LLM.",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=16,
+    show_default=True,
+    help="Maximum number of LLM requests in flight.",
+)
+def llm_resolve_many(
+    paths: tuple[Path, ...],
+    recursive: bool,
+    jobs: int | None,
+    model: str | None,
+    no_cache: bool,
+    concurrency: int,
+) -> None:
+    """Resolve identifier references in many source files using an LLM.
+
+    Source files are annotated in memory and sent to the LLM concurrently,
+    so network latency overlaps across files.  Prints a JSON object mapping
+    each path to its resolution.
+    """
+    # Import lazily so litellm is not required for other subcommands.
+    from . import llmresolver
+
+    effective_model: str = model or llmresolver.DEFAULT_MODEL
+
+    pending: list[tuple[str, str, bytes]] = []  # (path, language, annotated_utf8)
+    tasks: list[tuple[str, str]] = resolve_language_paths(paths, recursive)
+    for (file_path, language), annotated_utf8 in zip(
+        tasks, map_files(annotate_in_memory, tasks, jobs),
+    ):
+        if annotated_utf8 is None:
+            click.echo(
+                f"Warning: unsupported encoding for {file_path}, skipping.",
+                err=True,
+            )
+            continue
+        pending.append((file_path, language, annotated_utf8))
+
+    try:
+        outcomes: list[dict[str, Any] | Exception] = asyncio.run(llmresolver.resolve_many(
+            [(annotated_utf8, language) for _path, language, annotated_utf8 in pending],
+            model=effective_model,
+            use_cache=not no_cache,
+            max_concurrency=concurrency,
+        ))
+    except llmresolver.MissingAPIKeyError as exc:
+        raise click.ClickException(str(exc))
+    results: dict[str, dict[str, Any]] = {}
+    for (file_path, _language, _text), outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            click.echo(f"Warning: {file_path}: {outcome}", err=True)
+        else:
+            results[file_path] = outcome
+    click.echo(json.dumps(
+        {
+            os.path.relpath(file_path): results[file_path]
+            for file_path, _language, _text in pending
+            if file_path in results
+        },
+        indent=2,
+    ))
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,103 @@
+"""Per-file work for the CLI, run in worker processes.
+
+These live outside ``__main__`` so that pool workers started with the
+``spawn`` method (the default on macOS and Windows) can import them by name;
+``multiprocessing`` never re-imports a package's ``__main__`` in a child.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import TypeVar
+
+from .annotating import (
+    ANNOTATED_SUFFIX,
+    FileEncoding,
+    annotate_source,
+    read_source_utf8,
+    write_output,
+)
+from .parsing import char_columns, line_start_offsets, parse_identifiers
+
+_T = TypeVar("_T")
+
+
+def dump_one(file_path: str, language: str) -> list[tuple[int, int, str]] | None:
+    """Return (row, char_col, text) for each identifier in *file_path*.
+
+    Returns *None* if the file's encoding is unsupported.
+    """
+    result: tuple[bytes, FileEncoding] | None = read_source_utf8(file_path)
+    if result is None:
+        return None
+    utf8_bytes, _enc = result
+    identifiers: list[tuple[int, int, str, int]] = parse_identifiers(utf8_bytes, language)
+    cols: list[int] = char_columns(utf8_bytes, line_start_offsets(utf8_bytes), identifiers)
+    return [
+        (row, char_col, text)
+        for (row, _byte_col, text, _byte_len), char_col in zip(identifiers, cols)
+    ]
+
+
+def annotate_one(file_path: str, language: str) -> int | None:
+    """Write the .annotated copy of *file_path* and return its identifier count.
+
+    Returns *None* if the file's encoding is unsupported.
+    """
+    result: tuple[bytes, FileEncoding] | None = read_source_utf8(file_path)
+    if result is None:
+        return None
+    utf8_bytes, enc = result
+    identifiers: list[tuple[int, int, str, int]] = parse_identifiers(utf8_bytes, language)
+    annotated_utf8, next_id = annotate_source(utf8_bytes, identifiers, 0)
+    write_output(file_path + ANNOTATED_SUFFIX, annotated_utf8, enc)
+    return next_id
+
+
+def annotate_in_memory(file_path: str, language: str) -> bytes | None:
+    """Return the annotated UTF-8 bytes of *file_path* without writing a file.
+
+    Returns *None* if the file's encoding is unsupported.
+    """
+    result: tuple[bytes, FileEncoding] | None = read_source_utf8(file_path)
+    if result is None:
+        return None
+    utf8_bytes, _enc = result
+    identifiers: list[tuple[int, int, str, int]] = parse_identifiers(utf8_bytes, language)
+    annotated_utf8, _next_id = annotate_source(utf8_bytes, identifiers, 0)
+    return annotated_utf8
+
+
+def map_files(
+    fn: Callable[[str, str], _T],
+    tasks: list[tuple[str, str]],
+    jobs: int | None,
+) -> Iterable[_T]:
+    """Apply *fn* to each (path, language) task, yielding results in task order.
+
+    Files are spread over a process pool of *jobs* workers (default: CPU
+    count); a single worker or a single file runs in-process.
+    """
+    workers: int = jobs or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        return (fn(file_path, language) for file_path, language in tasks)
+    return _map_files_parallel(fn, tasks, workers)
+
+
+def _map_files_parallel(
+    fn: Callable[[str, str], _T],
+    tasks: list[tuple[str, str]],
+    workers: int,
+) -> Iterator[_T]:
+    # Several tasks per chunk amortize IPC; four chunks per worker keeps
+    # the pool balanced when file sizes vary.
+    chunksize: int = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        yield from pool.map(
+            fn,
+            [file_path for file_path, _ in tasks],
+            [language for _, language in tasks],
+            chunksize=chunksize,
+        )
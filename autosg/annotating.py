@@ -2,18 +2,20 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
+import codecs
+import os
+from array import array
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
-from pathlib import Path
 
-from .parsing import parse_identifiers
+from .parsing import line_start_offsets
 
 # ---------------------------------------------------------------------------
 # Encoding detection
 # ---------------------------------------------------------------------------
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FileEncoding:
     """Detected encoding of a source file."""
 
@@ -30,6 +32,21 @@ _BOM_TABLE: list[tuple[bytes, str]] = [
     (b"\xef\xbb\xbf", "utf-8"),
 ]
 
+# _BOM_TABLE as (mask, value, bom_length, encoding) over the first four
+# bytes read as a little-endian integer, so detection is a handful of int
+# comparisons and every file shares one FileEncoding per BOM.
+_BOM_HEADERS: tuple[tuple[int, int, int, FileEncoding], ...] = tuple(
+    (
+        (1 << (8 * len(bom))) - 1,
+        int.from_bytes(bom, "little"),
+        len(bom),
+        FileEncoding(encoding, bom),
+    )
+    for bom, encoding in _BOM_TABLE
+)
+
+_UTF8_NO_BOM: FileEncoding = FileEncoding("utf-8", b"")
+
 
 def detect_encoding(raw: bytes) -> FileEncoding | None:
     """Detect file encoding via BOM, falling back to UTF-8.
@@ -37,79 +54,153 @@ def detect_encoding(raw: bytes) -> FileEncoding | None:
     Returns *None* if the encoding is unsupported (not valid UTF-8 and
     no recognised BOM).
     """
-    for bom, encoding in _BOM_TABLE:
-        if raw.startswith(bom):
-            return FileEncoding(encoding, bom)
-    # No BOM — try UTF-8
+    header: int = int.from_bytes(raw[:4], "little")
+    size: int = len(raw)
+    for mask, value, bom_len, enc in _BOM_HEADERS:
+        if header & mask == value and size >= bom_len:
+            return enc
+    # No BOM — validate as UTF-8.  Pure ASCII (the common case) is checked
+    # without allocating; otherwise decoding is the stdlib's only validator.
+    if raw.isascii():
+        return _UTF8_NO_BOM
     try:
         raw.decode("utf-8")
-        return FileEncoding("utf-8", b"")
+        return _UTF8_NO_BOM
     except UnicodeDecodeError:
         return None
 
 
-def read_source_utf8(source_path: Path) -> tuple[bytes, FileEncoding] | None:
+_TRANSCODE_CHUNK: int = 1 << 20
+
+
+def _transcode(data: bytes | memoryview, source: str, target: str) -> bytes:
+    """Convert *data* from the *source* encoding to the *target* encoding.
+
+    Large inputs go through incremental codecs one chunk at a time, so only
+    a chunk (not the whole file) is ever held as an intermediate ``str``.
+    """
+    if len(data) <= _TRANSCODE_CHUNK:
+        return str(data, source).encode(target)
+    decoder = codecs.getincrementaldecoder(source)()
+    encoder = codecs.getincrementalencoder(target)()
+    view: memoryview = memoryview(data)
+    parts: list[bytes] = [
+        encoder.encode(decoder.decode(view[i : i + _TRANSCODE_CHUNK]))
+        for i in range(0, len(view), _TRANSCODE_CHUNK)
+    ]
+    parts.append(encoder.encode(decoder.decode(b"", final=True), final=True))
+    return b"".join(parts)
+
+
+def read_source_utf8(
+    source_path: str | os.PathLike[str],
+) -> tuple[bytes, FileEncoding] | None:
     """Read a source file and return (utf8_bytes, encoding_info).
 
     The BOM is stripped from the returned bytes.  UTF-16/32 content is
     transcoded to UTF-8.  Returns *None* for unsupported encodings.
     """
-    raw: bytes = source_path.read_bytes()
+    with open(source_path, "rb") as f:
+        raw: bytes = f.read()
     enc: FileEncoding | None = detect_encoding(raw)
     if enc is None:
         return None
-    payload: bytes = raw[len(enc.bom) :]
     if enc.encoding == "utf-8":
-        return payload, enc
-    text: str = payload.decode(enc.encoding)
-    return text.encode("utf-8"), enc
+        # Slicing off an empty BOM returns *raw* itself, without a copy.
+        return raw[len(enc.bom) :], enc
+    # Transcode straight from a view so the BOM-stripped payload is not copied.
+    return _transcode(memoryview(raw)[len(enc.bom) :], enc.encoding, "utf-8"), enc
+
 
+def encode_output(utf8_bytes: bytes, enc: FileEncoding) -> tuple[bytes, bytes]:
+    """Encode UTF-8 bytes back to the original encoding.
 
-def encode_output(utf8_bytes: bytes, enc: FileEncoding) -> bytes:
-    """Encode UTF-8 bytes back to the original encoding, prepending the BOM."""
+    Returns (bom, payload) rather than their concatenation so the two can
+    be written without copying the payload (see ``write_output``).
+    """
     if enc.encoding == "utf-8":
-        return enc.bom + utf8_bytes
-    return enc.bom + utf8_bytes.decode("utf-8").encode(enc.encoding)
+        return enc.bom, utf8_bytes
+    return enc.bom, _transcode(utf8_bytes, "utf-8", enc.encoding)
+
+
+# os.writev is POSIX-only; elsewhere write_output falls back to os.write.
+_writev: Callable[[int, Sequence[memoryview]], int] | None = getattr(os, "writev", None)
+
+
+def write_output(
+    out_path: str | os.PathLike[str], utf8_bytes: bytes, enc: FileEncoding,
+) -> None:
+    """Write UTF-8 bytes to *out_path* in the original encoding, with its BOM.
+
+    BOM and payload go out in a single ``writev`` call where available.
+    """
+    views: list[memoryview] = [memoryview(part) for part in encode_output(utf8_bytes, enc) if part]
+    fd: int = os.open(
+        out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666,
+    )
+    try:
+        while views:
+            written: int = _writev(fd, views) if _writev is not None else os.write(fd, views[0])
+            # Drop whatever was fully written; a short write leaves a tail.
+            while views and written >= len(views[0]):
+                written -= len(views[0])
+                views.pop(0)
+            if written:
+                views[0] = views[0][written:]
+    finally:
+        os.close(fd)
 
 
 # ---------------------------------------------------------------------------
 # Annotation
 # ---------------------------------------------------------------------------
 
+# Appended to a source path to name its annotated copy.
+ANNOTATED_SUFFIX: str = ".annotated"
 
-def _format_identifier(ident_id: int, text: str) -> str:
+# Pre-encoded so markers are formatted directly as UTF-8 bytes.
+_ANNOTATION_FORMAT: bytes = "\u00ab%d|%s\u00bb".encode("utf-8")
+
+
+def _format_identifier(ident_id: int, text_bytes: bytes | memoryview) -> bytes:
     """Format an identifier with its ID using guillemet-pipe style: «id|text»."""
-    return f"\u00ab{ident_id}|{text}\u00bb"
+    return _ANNOTATION_FORMAT % (ident_id, text_bytes)
 
 
 def annotate_source(
     utf8_bytes: bytes,
-    language: str,
+    identifiers: list[tuple[int, int, str, int]],
     start_id: int,
 ) -> tuple[bytes, int]:
     """Annotate identifiers in UTF-8 source bytes.
 
+    *identifiers* is the output of ``parse_identifiers`` for the same bytes.
     Returns (annotated_utf8_bytes, next_available_id).
     All splicing is done on UTF-8 bytes so tree-sitter's byte offsets
     stay aligned.
     """
-    identifiers: list[tuple[int, int, str]] = parse_identifiers(utf8_bytes, language)
-    lines: list[bytes] = utf8_bytes.splitlines(keepends=True)
+    line_starts: array[int] = line_start_offsets(utf8_bytes)
 
-    # Build {0-indexed row: [(byte_col_0indexed, text, global_id), ...]}
-    by_row: dict[int, list[tuple[int, str, int]]] = defaultdict(list)
+    # [(absolute_byte_offset, byte_len, global_id), ...] in source order
+    located: list[tuple[int, int, int]] = []
     current_id: int = start_id
-    for row_1, col_1, text in identifiers:
-        by_row[row_1 - 1].append((col_1 - 1, text, current_id))
+    for row_1, col_1, _text, byte_len in identifiers:
+        located.append((line_starts[row_1 - 1] + col_1 - 1, byte_len, current_id))
         current_id += 1
-
-    # Process each row, replacing identifiers right-to-left in bytes
-    for row_idx, entries in by_row.items():
-        line: bytes = lines[row_idx]
-        for byte_col, text, ident_id in sorted(entries, key=lambda e: e[0], reverse=True):
-            text_bytes: bytes = text.encode("utf-8")
-            replacement: bytes = _format_identifier(ident_id, text).encode("utf-8")
-            line = line[:byte_col] + replacement + line[byte_col + len(text_bytes) :]
-        lines[row_idx] = line
-
-    return b"".join(lines), current_id
+    located.sort(key=lambda e: e[0])
+
+    # Single forward sweep: copy the unchanged bytes between identifiers
+    # and splice in each replacement, joining once at the end.
+    # Unchanged segments are zero-copy views; only the join materializes them.
+    source: memoryview = memoryview(utf8_bytes)
+    parts: list[bytes | memoryview] = []
+    cursor: int = 0
+    for offset, byte_len, ident_id in located:
+        end: int = offset + byte_len
+        parts.append(source[cursor:offset])
+        # The identifier's text is sliced from the source, never re-encoded.
+        parts.append(_format_identifier(ident_id, source[offset:end]))
+        cursor = end
+    parts.append(source[cursor:])
+
+    return b"".join(parts), current_id
@@ -9,17 +9,36 @@ the annotated content, model, or prompt changes.
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import functools
 import hashlib
 import json
+import os
 import re
 import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
 from pathlib import Path
-from typing import Any
+from typing import Any, Protocol
 
 from dotenv import load_dotenv
-from litellm import completion # type: ignore
+from litellm import acompletion, completion # type: ignore
 from litellm.exceptions import AuthenticationError as _AuthenticationError
 
+_zstd: Any
+try:
+    import zstandard as _zstd  # type: ignore
+except ImportError:
+    _zstd = None
+
+_orjson: Any
+try:
+    import orjson as _orjson  # type: ignore
+except ImportError:
+    _orjson = None
+
 load_dotenv()
 
 DEFAULT_MODEL: str = "anthropic/claude-sonnet-4-20250514"
@@ -80,10 +99,38 @@ a brief explanation.
 # ---------------------------------------------------------------------------
 
 
+# One connection per process, opened on first use and shared across threads
+# (guarded by _cache_lock), so a batch of resolves pays for connection setup
+# and schema checks once rather than per call.
+_cache_conn: sqlite3.Connection | None = None
+_cache_lock: threading.Lock = threading.Lock()
+
+# Most recently used responses keyed by (source_hash, model), so repeat
+# lookups within a run skip the SQLite round-trip.  Also guarded by
+# _cache_lock; callers must not mutate the returned dicts.
+_MEMORY_CACHE_SIZE: int = 1024
+_memory_cache: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+
+
 def _open_cache_db() -> sqlite3.Connection:
+    """Return the shared cache connection, opening (or creating) the database."""
+    global _cache_conn
+    with _cache_lock:
+        if _cache_conn is None:
+            _cache_conn = _connect_cache_db()
+            atexit.register(_cache_conn.close)
+        return _cache_conn
+
+
+def _connect_cache_db() -> sqlite3.Connection:
     """Open (or create) the cache database and return a connection."""
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    conn: sqlite3.Connection = sqlite3.connect(CACHE_DB)
+    conn: sqlite3.Connection = sqlite3.connect(CACHE_DB, check_same_thread=False)
+    # WAL with synchronous=NORMAL makes each commit an append without an
+    # fsync; the cache can always be rebuilt, so that durability is enough.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     conn.execute(
         "CREATE TABLE IF NOT EXISTS cache ("
         "  source_hash     TEXT    NOT NULL,"
@@ -93,26 +140,135 @@ def _open_cache_db() -> sqlite3.Connection:
         "  PRIMARY KEY (source_hash, model, prompt_version)"
         ")"
     )
+    # zstd-compressed responses get their own table, so older readers of
+    # the shared cache.db never see a BLOB where they expect JSON text.
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache_zstd ("
+        "  source_hash     TEXT    NOT NULL,"
+        "  model           TEXT    NOT NULL,"
+        "  prompt_version  INTEGER NOT NULL,"
+        "  response        BLOB    NOT NULL,"
+        "  PRIMARY KEY (source_hash, model, prompt_version)"
+        ")"
+    )
     return conn
 
 
-def _source_hash(annotated_source: str) -> str:
-    """SHA-256 hex digest of the annotated source text."""
-    return hashlib.sha256(annotated_source.encode("utf-8")).hexdigest()
+class _Hash(Protocol):
+    """The part of a hashlib-style hash object used for cache keys."""
+
+    def hexdigest(self) -> str: ...
+
+
+def _select_hasher() -> tuple[str, Callable[[bytes], _Hash]]:
+    """Pick the fastest available hash for cache keys as (prefix, constructor).
+
+    Keys only need to be collision-resistant, not cryptographic, so BLAKE3
+    or XXH3-128 are preferred when installed.  The prefix keeps keys from
+    different algorithms apart; SHA-256 keys are unprefixed so caches
+    written before the choice existed stay valid.  Set
+    ``AUTOSG_CACHE_HASH=sha256`` to force SHA-256.
+    """
+    if os.environ.get("AUTOSG_CACHE_HASH", "").lower() != "sha256":
+        try:
+            from blake3 import blake3  # type: ignore
+            return "b3:", blake3
+        except ImportError:
+            pass
+        try:
+            from xxhash import xxh3_128  # type: ignore
+            return "xxh128:", xxh3_128
+        except ImportError:
+            pass
+    return "", hashlib.sha256
+
+
+_HASH_PREFIX, _hash_new = _select_hasher()
+
+
+def _source_hash(annotated_utf8: bytes) -> str:
+    """Hex digest of the annotated source bytes, prefixed with its algorithm."""
+    return _HASH_PREFIX + _hash_new(annotated_utf8).hexdigest()
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize *obj* to compact UTF-8 JSON, via ``orjson`` when installed."""
+    if _orjson is not None:
+        return _orjson.dumps(obj)  # type: ignore[no-any-return]
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: str | bytes) -> Any:
+    """Parse JSON, via ``orjson`` when installed.
+
+    Both parsers raise a ``ValueError`` subclass on malformed input.
+    """
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def _remember(key: tuple[str, str], response: dict[str, Any]) -> None:
+    """Add a response to the in-memory LRU in front of SQLite."""
+    with _cache_lock:
+        _memory_cache[key] = response
+        _memory_cache.move_to_end(key)
+        if len(_memory_cache) > _MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+# With zstandard installed, responses are written compressed to cache_zstd;
+# reads check it first and fall back to plain JSON rows in cache.
+_CACHE_WRITE_TABLE: str = "cache" if _zstd is None else "cache_zstd"
+_CACHE_READ_TABLES: tuple[str, ...] = ("cache",) if _zstd is None else ("cache_zstd", "cache")
+
+
+def _encode_response(response: dict[str, Any]) -> str | bytes:
+    """Serialize a response for ``_CACHE_WRITE_TABLE``.
+
+    With ``zstandard`` installed the JSON is stored as a compressed BLOB,
+    otherwise as plain JSON text.
+    """
+    data: bytes = _json_dumps(response)
+    if _zstd is None:
+        return data.decode("utf-8")
+    return _zstd.ZstdCompressor(level=3).compress(data)  # type: ignore[no-any-return]
+
+
+def _decode_response(value: str | bytes) -> dict[str, Any] | None:
+    """Inverse of ``_encode_response``; *None* if the value cannot be read."""
+    if isinstance(value, str):
+        return _json_loads(value)  # type: ignore[no-any-return]
+    if _zstd is None:
+        return None  # written by an install that had zstandard
+    return _json_loads(_zstd.ZstdDecompressor().decompress(value))  # type: ignore[no-any-return]
 
 
 def _cache_get(
     conn: sqlite3.Connection, source_hash: str, model: str,
 ) -> dict[str, Any] | None:
     """Return a cached response, or *None* on cache miss."""
-    row = conn.execute(
-        "SELECT response FROM cache"
-        " WHERE source_hash = ? AND model = ? AND prompt_version = ?",
-        (source_hash, model, PROMPT_VERSION),
-    ).fetchone()
-    if row is not None:
-        return json.loads(row[0])  # type: ignore[no-any-return]
-    return None
+    key: tuple[str, str] = (source_hash, model)
+    with _cache_lock:
+        remembered: dict[str, Any] | None = _memory_cache.get(key)
+        if remembered is not None:
+            _memory_cache.move_to_end(key)
+            return remembered
+        row: Any = None
+        for table in _CACHE_READ_TABLES:
+            row = conn.execute(
+                f"SELECT response FROM {table}"
+                " WHERE source_hash = ? AND model = ? AND prompt_version = ?",
+                (source_hash, model, PROMPT_VERSION),
+            ).fetchone()
+            if row is not None:
+                break
+    if row is None:
+        return None
+    response: dict[str, Any] | None = _decode_response(row[0])
+    if response is not None:
+        _remember(key, response)
+    return response
 
 
 def _cache_put(
@@ -122,13 +278,25 @@ def _cache_put(
     response: dict[str, Any],
 ) -> None:
     """Store a response in the cache."""
-    conn.execute(
-        "INSERT OR REPLACE INTO cache"
-        " (source_hash, model, prompt_version, response)"
-        " VALUES (?, ?, ?, ?)",
-        (source_hash, model, PROMPT_VERSION, json.dumps(response)),
-    )
-    conn.commit()
+    _cache_put_many(conn, [(source_hash, model, response)])
+
+
+def _cache_put_many(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[str, str, dict[str, Any]]],
+) -> None:
+    """Store (source_hash, model, response) rows in a single transaction."""
+    records: list[tuple[str, str, int, str | bytes]] = []
+    for source_hash, model, response in rows:
+        _remember((source_hash, model), response)
+        records.append((source_hash, model, PROMPT_VERSION, _encode_response(response)))
+    with _cache_lock, conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {_CACHE_WRITE_TABLE}"
+            " (source_hash, model, prompt_version, response)"
+            " VALUES (?, ?, ?, ?)",
+            records,
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -136,9 +304,76 @@ def _cache_put(
 # ---------------------------------------------------------------------------
 
 
+# PROMPT_TEMPLATE split around its single {source} field; each half only
+# has {lang} fields and {{ }} escapes left.
+_PROMPT_HEAD, _, _PROMPT_TAIL = PROMPT_TEMPLATE.partition("{source}")
+
+
+@functools.lru_cache(maxsize=None)
+def _prompt_parts(language: str) -> tuple[str, str]:
+    """Return the prompt text before and after the source for *language*."""
+    return _PROMPT_HEAD.format(lang=language), _PROMPT_TAIL.format(lang=language)
+
+
 def build_prompt(annotated_source: str, language: str) -> str:
     """Build the full prompt for the LLM."""
-    return PROMPT_TEMPLATE.format(lang=language, source=annotated_source)
+    head, tail = _prompt_parts(language)
+    return head + annotated_source + tail
+
+
+_JSON_FENCE_RE: re.Pattern[str] = re.compile(r"```(?:json)?\s*\n(.*?)\n\s*```", re.DOTALL)
+
+
+def _first_json_object(text: str) -> str | None:
+    """Return the first brace-balanced ``{ ... }`` span in *text*, if any.
+
+    A single linear scan that skips braces inside JSON strings; unlike a
+    greedy ``\\{.*\\}`` regex it stops at the object's closing brace.
+    """
+    start: int = text.find("{")
+    if start == -1:
+        return None
+    depth: int = 0
+    in_string: bool = False
+    escaped: bool = False
+    for i in range(start, len(text)):
+        c: str = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+    return None
+
+
+class MissingAPIKeyError(RuntimeError):
+    """LiteLLM rejected the request for lack of credentials."""
+
+
+def _missing_api_key() -> MissingAPIKeyError:
+    """Error raised when LiteLLM rejects the request for lack of credentials."""
+    return MissingAPIKeyError(
+        "Missing API key. Set ANTHROPIC_API_KEY in your environment "
+        "(or the appropriate key for your chosen --model)."
+    )
+
+
+def _parse_completion(response: Any) -> dict[str, Any]:
+    """Extract the resolution JSON from a LiteLLM completion response."""
+    content: str | None = response.choices[0].message.content
+    if content is None:
+        raise ValueError("LLM returned an empty response")
+    return _extract_json(content)
 
 
 def _extract_json(text: str) -> dict[str, Any]:
@@ -146,16 +381,21 @@ def _extract_json(text: str) -> dict[str, Any]:
 
     Handles responses wrapped in markdown code fences as well as bare JSON.
     """
-    # Try a ```json ... ``` code block first.
-    match: re.Match[str] | None = re.search(
-        r"```(?:json)?\s*\n(.*?)\n\s*```", text, re.DOTALL,
-    )
+    # Bare JSON (the common case) needs no regex scan at all.
+    stripped: str = text.strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        try:
+            return _json_loads(stripped)  # type: ignore[no-any-return]
+        except ValueError:
+            pass
+    # Then a ```json ... ``` code block.
+    match: re.Match[str] | None = _JSON_FENCE_RE.search(text)
     if match:
-        return json.loads(match.group(1))  # type: ignore[no-any-return]
-    # Fall back to the first top-level { ... } block.
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if match:
-        return json.loads(match.group(0))  # type: ignore[no-any-return]
+        return _json_loads(match.group(1))  # type: ignore[no-any-return]
+    # Fall back to the first balanced { ... } block.
+    block: str | None = _first_json_object(text)
+    if block is not None:
+        return _json_loads(block)  # type: ignore[no-any-return]
     raise ValueError("No JSON object found in LLM response")
 
 
@@ -165,7 +405,7 @@ def _extract_json(text: str) -> dict[str, Any]:
 
 
 def resolve(
-    annotated_source: str,
+    annotated_utf8: bytes,
     language: str,
     *,
     model: str = DEFAULT_MODEL,
@@ -173,20 +413,22 @@ def resolve(
 ) -> dict[str, Any]:
     """Send annotated source to an LLM and return parsed resolution JSON.
 
+    *annotated_utf8* is hashed as-is for the cache key and only decoded
+    when a prompt has to be built.
+
     Returns a dict with keys ``definitions``, ``external``, ``errors``.
     Raises ``ValueError`` if the response cannot be parsed as JSON.
     """
-    source_hash: str = _source_hash(annotated_source)
+    source_hash: str = _source_hash(annotated_utf8)
 
     conn: sqlite3.Connection | None = None
     if use_cache:
         conn = _open_cache_db()
         cached: dict[str, Any] | None = _cache_get(conn, source_hash, model)
         if cached is not None:
-            conn.close()
             return cached
 
-    prompt: str = build_prompt(annotated_source, language)
+    prompt: str = build_prompt(annotated_utf8.decode("utf-8"), language)
     try:
         response = completion(
             model=model,
@@ -194,18 +436,85 @@ def resolve(
             temperature=0,
         )
     except _AuthenticationError as exc:
-        raise RuntimeError(
-            "Missing API key. Set ANTHROPIC_API_KEY in your environment "
-            "(or the appropriate key for your chosen --model)."
-        ) from exc
-    content: str | None = response.choices[0].message.content # type: ignore
-    if content is None:
-        raise ValueError("LLM returned an empty response")
-    result: dict[str, Any] = _extract_json(content) # type: ignore
+        raise _missing_api_key() from exc
+    result: dict[str, Any] = _parse_completion(response)
 
     if use_cache:
         assert conn is not None
         _cache_put(conn, source_hash, model, result)
-        conn.close()
 
     return result
+
+
+async def resolve_many(
+    sources: Sequence[tuple[bytes, str]],
+    *,
+    model: str = DEFAULT_MODEL,
+    use_cache: bool = True,
+    max_concurrency: int = 16,
+) -> list[dict[str, Any] | Exception]:
+    """Resolve many annotated sources, overlapping the LLM round-trips.
+
+    *sources* holds ``(annotated_utf8, language)`` pairs as passed to
+    ``resolve``.  Cache hits are answered from SQLite up front; misses are
+    sent with at most *max_concurrency* requests in flight, once per
+    distinct source.
+
+    Returns one entry per source, in order: the resolution dict, or the
+    exception that source failed with (a ``ValueError`` if the response
+    could not be parsed, or the LiteLLM error for the request).
+    Raises ``MissingAPIKeyError`` if the API key is missing.
+    """
+    source_hashes: list[str] = [_source_hash(annotated_utf8) for annotated_utf8, _ in sources]
+    results: list[dict[str, Any] | Exception | None] = [None] * len(sources)
+
+    conn: sqlite3.Connection | None = _open_cache_db() if use_cache else None
+    # Sources missing from the cache, grouped by hash so identical sources
+    # in one batch share a single request.
+    misses: dict[str, list[int]] = {}
+    for i, source_hash in enumerate(source_hashes):
+        cached: dict[str, Any] | None = None
+        if conn is not None:
+            cached = _cache_get(conn, source_hash, model)
+        if cached is not None:
+            results[i] = cached
+        else:
+            misses.setdefault(source_hash, []).append(i)
+
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(i: int) -> dict[str, Any]:
+        annotated_utf8, language = sources[i]
+        async with semaphore:
+            # Built under the semaphore so only in-flight prompts are held.
+            prompt: str = build_prompt(annotated_utf8.decode("utf-8"), language)
+            try:
+                response = await acompletion(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0,
+                )
+            except _AuthenticationError as exc:
+                raise _missing_api_key() from exc
+        return _parse_completion(response)
+
+    outcomes: list[dict[str, Any] | BaseException] = await asyncio.gather(
+        *(fetch(indices[0]) for indices in misses.values()), return_exceptions=True,
+    )
+    fetched: list[tuple[str, str, dict[str, Any]]] = []
+    error: BaseException | None = None
+    for (source_hash, indices), outcome in zip(misses.items(), outcomes):
+        if isinstance(outcome, MissingAPIKeyError) or not isinstance(outcome, (dict, Exception)):
+            error = error or outcome
+            continue
+        for i in indices:
+            results[i] = outcome
+        if not isinstance(outcome, Exception):
+            fetched.append((source_hash, model, outcome))
+    # Cache what succeeded before re-raising, so a failed batch does not
+    # throw away responses already paid for.
+    if conn is not None and fetched:
+        _cache_put_many(conn, fetched)
+    if error is not None:
+        raise error
+    return results  # type: ignore[return-value]
@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import os
+import sys
 import warnings
-from collections.abc import Iterator
-from pathlib import Path
-from typing import cast
+from array import array
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import NamedTuple, cast
 
-from tree_sitter import Node, Parser, Tree
+from tree_sitter import Language, Node, Parser, Tree, TreeCursor
 
 with warnings.catch_warnings():
     warnings.simplefilter("ignore", FutureWarning)
-    from tree_sitter_languages import get_parser # type: ignore
+    from tree_sitter_languages import get_language, get_parser # type: ignore
 
 # ---------------------------------------------------------------------------
 # Language detection
@@ -143,9 +148,30 @@ EXTENSION_TO_LANGUAGE: dict[str, str] = {
 }
 
 
-def detect_language(path: Path) -> str | None:
+# Extensions match case-insensitively (``.PY``, ``.Cpp``), so the lookup
+# table is keyed on lowercase suffixes.
+_EXT_LOOKUP: MappingProxyType[str, str] = MappingProxyType(
+    {ext.lower(): language for ext, language in EXTENSION_TO_LANGUAGE.items()}
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _detect_by_suffix(suffix: str) -> str | None:
+    """Language for a file suffix; a corpus has few distinct suffixes."""
+    return _EXT_LOOKUP.get(suffix.lower())
+
+
+def path_suffix(path: str | os.PathLike[str]) -> str:
+    """Return the final component's suffix, as ``PurePath.suffix`` would."""
+    name: str = os.path.basename(path)
+    i: int = name.rfind(".")
+    return name[i:] if 0 < i < len(name) - 1 else ""
+
+
+def detect_language(path: str | os.PathLike[str]) -> str | None:
     """Detect tree-sitter language name from a file path."""
-    return FILENAME_TO_LANGUAGE.get(path.name) or EXTENSION_TO_LANGUAGE.get(path.suffix)
+    name: str = os.path.basename(path)
+    return FILENAME_TO_LANGUAGE.get(name) or _detect_by_suffix(path_suffix(name))
 
 
 # ---------------------------------------------------------------------------
@@ -198,35 +224,178 @@ LANGUAGE_IDENTIFIER_TYPES: dict[str, frozenset[str]] = {
 # ---------------------------------------------------------------------------
 
 
-def collect_identifiers(node: Node, ident_types: frozenset[str]) -> Iterator[Node]:
-    """Recursively collect all leaf identifier nodes from the syntax tree."""
-    if node.child_count == 0 and node.type in ident_types:
-        yield node
-    for child in node.children:
-        yield from collect_identifiers(child, ident_types)
+def collect_identifiers(node: Node, ident_type_ids: frozenset[int]) -> list[Node]:
+    """Collect all leaf identifier nodes under *node*, in source order.
 
+    Walks the tree iteratively with a ``TreeCursor`` rather than recursing
+    through ``node.children``, which builds a Python list at every node.
+    Leaves are matched on their integer ``kind_id`` (see ``_ident_type_ids``).
+    """
+    identifiers: list[Node] = []
+    cursor: TreeCursor = node.walk()
+    while True:
+        if cursor.goto_first_child():
+            continue
+        leaf: Node = cursor.node
+        if leaf.kind_id in ident_type_ids:
+            identifiers.append(leaf)
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return identifiers
 
-def parse_identifiers(source_utf8: bytes, language: str) -> list[tuple[int, int, str]]:
-    """Parse UTF-8 source bytes and return identifiers as (row, byte_col, text).
 
-    Row is 1-indexed. byte_col is the 1-indexed byte offset within the line
-    (relative to the BOM-stripped UTF-8 content). Use ``byte_col_to_char_col``
-    to convert to a character column for display.
-    """
+class _LanguageParser(NamedTuple):
+    """A parser together with its language's identifier node kind ids."""
+
+    parser: Parser
+    ident_type_ids: frozenset[int]
+
+
+@functools.lru_cache(maxsize=None)
+def _parser_for(language: str) -> _LanguageParser:
+    """Return the parser for *language* and its identifier kind ids, once per process."""
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", FutureWarning)
         parser: Parser = cast(Parser, get_parser(language))
+    return _LanguageParser(parser, _ident_type_ids(language))
+
+
+@functools.lru_cache(maxsize=None)
+def _ident_type_ids(language: str) -> frozenset[int]:
+    """Node kind ids whose name is one of *language*'s identifier types.
+
+    Comparing ``kind_id`` integers avoids hashing a type string per node.
+    Every id carrying a matching name is included, so aliased kinds still
+    match exactly as they would by ``node.type``.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        lang: Language = cast(Language, get_language(language))
     ident_types: frozenset[str] = LANGUAGE_IDENTIFIER_TYPES.get(language, _DEFAULT_IDENT)
+    return frozenset(
+        kind_id
+        for kind_id in range(lang.node_kind_count)
+        if lang.node_kind_for_id(kind_id) in ident_types
+    )
+
+
+# Parsed identifiers keyed by (SHA-1 of source, language), most recently used
+# last, so identical sources (vendored copies, re-annotation of the same file)
+# are only parsed once per process.  Bounded by the total number of cached
+# identifiers (each entry counts at least one) rather than by entries, so a
+# run over large files does not pin their parses in every worker; a file
+# with more identifiers than the whole budget is not cached at all.
+_PARSE_CACHE_MAX_IDENTIFIERS: int = 1 << 16
+_parse_cache: OrderedDict[tuple[bytes, str], list[tuple[int, int, str, int]]] = OrderedDict()
+_parse_cache_identifiers: int = 0
+
+
+def _parse_cost(identifiers: list[tuple[int, int, str, int]]) -> int:
+    """Budget charged for a memo entry; at least 1 so empty parses are bounded too."""
+    return max(1, len(identifiers))
+
+
+def parse_identifiers(source_utf8: bytes, language: str) -> list[tuple[int, int, str, int]]:
+    """Parse UTF-8 source bytes into (row, byte_col, text, byte_len) identifiers.
+
+    Row is 1-indexed. byte_col is the 1-indexed byte offset within the line
+    (relative to the BOM-stripped UTF-8 content) and byte_len the length of
+    the identifier's UTF-8 encoding. Use ``char_columns`` (or
+    ``byte_col_to_char_col`` for a single identifier) to convert to a
+    character column for display.
+
+    Results are memoized by content hash; callers must not mutate the
+    returned list.
+    """
+    global _parse_cache_identifiers
+    key: tuple[bytes, str] = (hashlib.sha1(source_utf8).digest(), language)
+    cached: list[tuple[int, int, str, int]] | None = _parse_cache.get(key)
+    if cached is not None:
+        _parse_cache.move_to_end(key)
+        return cached
+    parser, ident_type_ids = _parser_for(language)
     tree: Tree = parser.parse(source_utf8)
-    identifiers: list[tuple[int, int, str]] = []
-    for node in collect_identifiers(tree.root_node, ident_types):
-        row: int = node.start_point[0] + 1  # 1-indexed
-        byte_col: int = node.start_point[1] + 1  # 1-indexed byte offset
-        text: str = node.text.decode()
-        identifiers.append((row, byte_col, text))
+    identifiers: list[tuple[int, int, str, int]] = []
+    # Most names repeat within a file, so decode each distinct spelling once
+    # and intern it; repeats share a single str object.
+    decoded: dict[bytes, str] = {}
+    for node in collect_identifiers(tree.root_node, ident_type_ids):
+        point_row, point_col = node.start_point
+        row: int = point_row + 1  # 1-indexed
+        byte_col: int = point_col + 1  # 1-indexed byte offset
+        start: int = node.start_byte
+        end: int = node.end_byte
+        raw: bytes = source_utf8[start:end]
+        text: str | None = decoded.get(raw)
+        if text is None:
+            text = decoded[raw] = sys.intern(raw.decode("utf-8"))
+        identifiers.append((row, byte_col, text, end - start))
+    if len(identifiers) <= _PARSE_CACHE_MAX_IDENTIFIERS:
+        _parse_cache[key] = identifiers
+        _parse_cache_identifiers += _parse_cost(identifiers)
+        while _parse_cache_identifiers > _PARSE_CACHE_MAX_IDENTIFIERS:
+            _parse_cache_identifiers -= _parse_cost(_parse_cache.popitem(last=False)[1])
     return identifiers
 
 
-def byte_col_to_char_col(line_bytes: bytes, byte_col_1: int) -> int:
-    """Convert a 1-indexed byte offset to a 1-indexed character column."""
-    return len(line_bytes[: byte_col_1 - 1].decode("utf-8", errors="replace")) + 1
+def line_start_offsets(source_utf8: bytes) -> array[int]:
+    """Return the absolute byte offset at which each line starts.
+
+    Lines are split on ``\\n`` only, matching tree-sitter's row numbering,
+    so row *r* (1-indexed) starts at ``line_start_offsets(src)[r - 1]``.
+    """
+    starts: array[int] = array("q", [0])
+    find = source_utf8.find
+    pos: int = find(b"\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find(b"\n", pos + 1)
+    return starts
+
+
+def byte_col_to_char_col(source_utf8: bytes, line_start: int, byte_col_1: int) -> int:
+    """Convert a 1-indexed byte offset to a 1-indexed character column.
+
+    *line_start* is the absolute byte offset of the line within
+    *source_utf8* (see ``line_start_offsets``).
+    """
+    prefix: bytes = source_utf8[line_start : line_start + byte_col_1 - 1]
+    return len(prefix.decode("utf-8", errors="replace")) + 1
+
+
+# Maps UTF-8 continuation bytes (0b10xxxxxx) to 1 and every other byte to 0.
+_CONTINUATION_TABLE: bytes = bytes(1 if 0x80 <= b < 0xC0 else 0 for b in range(256))
+
+
+def char_columns(
+    source_utf8: bytes,
+    line_starts: array[int],
+    identifiers: list[tuple[int, int, str, int]],
+) -> list[int]:
+    """Return the 1-indexed character column of each identifier.
+
+    Equivalent to calling ``byte_col_to_char_col`` per identifier, but
+    every code point has exactly one non-continuation byte, so the column
+    is the byte column minus the continuation bytes before it.  Those are
+    counted in C over a single translated copy of the source instead of
+    decoding a prefix per identifier; pure-ASCII sources skip it entirely.
+
+    Identifiers on the same line reuse the running count from the previous
+    one, so each line is scanned once however many identifiers it holds.
+    """
+    if source_utf8.isascii():
+        return [byte_col for _row, byte_col, _text, _byte_len in identifiers]
+    continuation: bytes = source_utf8.translate(_CONTINUATION_TABLE)
+    count = continuation.count
+    cols: list[int] = []
+    counted_row: int = 0
+    counted_to: int = 0  # absolute offset the running count covers up to
+    skipped: int = 0  # continuation bytes from the line start to counted_to
+    for row, byte_col, _text, _byte_len in identifiers:
+        offset: int = line_starts[row - 1] + byte_col - 1
+        if row != counted_row or offset < counted_to:
+            counted_row, counted_to, skipped = row, line_starts[row - 1], 0
+        skipped += count(1, counted_to, offset)
+        counted_to = offset
+        cols.append(byte_col - skipped)
+    return cols